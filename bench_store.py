@@ -0,0 +1,165 @@
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import zlib
+
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+
+from transcript_store import TranscriptStore
+
+# Vocabulary for synthetic consults; each record combines several of these with random numbers
+# and a free-text fragment, so nearly every summary (and therefore every vector) is distinct
+COMPLAINTS = [
+    "chest pain", "shortness of breath", "persistent cough", "lower back pain", "migraine",
+    "abdominal pain", "fever and chills", "joint swelling", "skin rash", "dizziness",
+    "high blood sugar", "elevated blood pressure", "sore throat", "fatigue", "insomnia",
+    "palpitations", "nausea", "blurred vision", "ear pain", "knee pain", "numbness in the hands",
+    "weight loss", "heartburn", "frequent urination", "wheezing", "anxiety", "neck stiffness",
+    "ankle swelling", "tinnitus", "night sweats",
+]
+SEVERITIES = ["mild", "moderate", "severe", "intermittent", "worsening", "constant", "sharp", "dull"]
+DURATION_UNITS = ["days", "weeks", "months"]
+HISTORY = [
+    "type 2 diabetes", "hypertension", "asthma", "hypothyroidism", "COPD", "prior MI",
+    "chronic kidney disease", "depression", "osteoarthritis", "no significant history",
+]
+MEDICATIONS = [
+    "metformin", "lisinopril", "amlodipine", "atorvastatin", "salbutamol", "omeprazole",
+    "levothyroxine", "sertraline", "ibuprofen", "amoxicillin", "prednisolone", "paracetamol",
+]
+PLANS = [
+    "ordered blood work", "prescribed antibiotics", "referred to cardiology", "advised rest and fluids",
+    "adjusted insulin dose", "scheduled an MRI", "started physiotherapy", "ordered a chest x-ray",
+    "referred to neurology", "ordered an ECG", "arranged an ultrasound", "referred to dermatology",
+]
+FOLLOW_UPS = ["in one week", "in two weeks", "in a month", "in three months", "if symptoms persist"]
+FREE_TEXT = (
+    "patient works night shifts travels often lives alone recently moved smokes occasionally quit "
+    "smoking last year drinks socially exercises daily sedentary job family history of stroke "
+    "cares for elderly parent stressed at work sleeps poorly vegetarian diet recent flight long "
+    "drive gardening accident fell on stairs lifting boxes playing football new mattress pregnant "
+    "partner anxious about results wants second opinion prefers morning appointments hearing aid"
+).split()
+
+
+class HashedEmbeddingFunction(EmbeddingFunction):
+    """
+    Offline stand-in for MiniLM: hashes word unigrams and bigrams into a normalized 384-d vector.
+    Only meant for measuring Chroma/HNSW costs where the model weights cannot be downloaded.
+    """
+
+    def __init__(self, dimensions=384):
+        self.dimensions = dimensions
+
+    def __call__(self, input):
+        vectors = np.zeros((len(input), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(input):
+            tokens = text.lower().split()
+            for token in tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]:
+                h = zlib.crc32(token.encode("utf-8"))
+                vectors[row, h % self.dimensions] += 1.0 if h & 0x80000000 else -1.0
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+        return vectors.tolist()
+
+
+def make_consult(rng):
+    age = rng.randint(18, 92)
+    sex = rng.choice(["male", "female"])
+    complaints = rng.sample(COMPLAINTS, rng.randint(1, 3))
+    severity = rng.choice(SEVERITIES)
+    duration = f"{rng.randint(1, 30)} {rng.choice(DURATION_UNITS)}"
+    history = rng.choice(HISTORY)
+    medication = f"{rng.choice(MEDICATIONS)} {rng.choice([5, 10, 20, 25, 40, 50, 100, 250, 500])} mg"
+    vitals = (
+        f"BP {rng.randint(95, 185)}/{rng.randint(55, 115)}, HR {rng.randint(48, 130)}, "
+        f"temp {rng.uniform(35.8, 39.8):.1f}"
+    )
+    plan = " and ".join(rng.sample(PLANS, rng.randint(1, 2)))
+    note = " ".join(rng.choices(FREE_TEXT, k=rng.randint(4, 8)))
+
+    transcription = (
+        f"Doctor: What brings you in today? Patient: I have had {severity} {complaints[0]} for {duration}. "
+        f"Doctor: Anything else? Patient: {', '.join(complaints[1:]) or 'Nothing else'}. "
+        f"Doctor: Any medical history? Patient: {history}, and I take {medication}. Also, {note}."
+    )
+    summary = (
+        f"{age} year old {sex} with {severity} {', '.join(complaints)} for {duration}. "
+        f"History of {history}, on {medication}. {vitals}. Doctor {plan}, follow up "
+        f"{rng.choice(FOLLOW_UPS)}. Notes: {note}."
+    )
+    return transcription, summary
+
+
+def run(size, queries, seed, embedding_function):
+    rng = random.Random(seed)
+    path = tempfile.mkdtemp(prefix="transcript_store_bench_")
+    try:
+        store = TranscriptStore(path=path, embedding_function=embedding_function)
+        store.start()
+
+        # Ingestion: enqueue everything, then wait for the background indexer to drain
+        summaries = set()
+        start = time.perf_counter()
+        for i in range(size):
+            transcription, summary = make_consult(rng)
+            summaries.add(summary)
+            store.add(transcription, summary, source=f"bench-{i}.wav")
+        enqueued = time.perf_counter() - start
+        store.flush()
+        ingested = time.perf_counter() - start
+
+        # Queries: one warm-up, then time each search end to end (embedding included)
+        store.search("patient with chest pain referred to cardiology")
+        latencies = []
+        for _ in range(queries):
+            query = f"{rng.choice(SEVERITIES)} {rng.choice(COMPLAINTS)} {rng.choice(PLANS)}"
+            start = time.perf_counter()
+            store.search(query, limit=5)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+
+        store.close()
+        return {
+            "size": size,
+            "unique": len(summaries) / size,
+            "enqueue_s": enqueued,
+            "ingest_s": ingested,
+            "ingest_per_s": size / ingested,
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+            "max_ms": latencies[-1],
+        }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcript store ingestion and search.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 300000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--embedding", choices=["minilm", "hashed"], default="minilm",
+        help="minilm: the store's ONNX MiniLM model; hashed: offline stand-in that isolates Chroma/HNSW cost",
+    )
+    args = parser.parse_args()
+
+    embedding_function = HashedEmbeddingFunction() if args.embedding == "hashed" else None
+
+    print(f"{'records':>10} {'unique':>7} {'enqueue s':>10} {'ingest s':>10} {'rec/s':>10} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for size in args.sizes:
+        r = run(size, args.queries, args.seed, embedding_function)
+        print(
+            f"{r['size']:>10} {r['unique']:>7.1%} {r['enqueue_s']:>10.2f} {r['ingest_s']:>10.2f} "
+            f"{r['ingest_per_s']:>10.0f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['max_ms']:>8.2f}",
+            flush=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -7,8 +8,20 @@ import os
 import requests
 import json
 import time
+import uuid
 
-app = FastAPI()
+from segment_store import SegmentTranscript, query_segments, segment_path
+from transcript_store import TranscriptStore
+
+@asynccontextmanager
+async def lifespan(app):
+    # Past consults, embedded and indexed in the background for /search
+    app.state.store = TranscriptStore()
+    app.state.store.start()
+    yield
+    app.state.store.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware to allow requests from any origin
 app.add_middleware(
@@ -30,11 +43,13 @@ async def process_voice(file: UploadFile = File(...)):
             print("File Path : " + file_path)
 
         # Transcribe and translate the audio file
-        transcription = transcribe_and_translate_audio_with_groq(file_path)
+        result = transcribe_and_translate_audio_with_groq(file_path)
 
         # Check if transcription is None
-        if transcription is None:
+        if result is None or "error" in result:
             raise ValueError("Transcription failed.")
+
+        transcription = result.get("text", "").strip()
         
         print("transcription: " + transcription)  # Only print if transcription is valid
 
@@ -47,11 +62,22 @@ async def process_voice(file: UploadFile = File(...)):
 
         # Cleanup: Remove the saved file after processing
         os.remove(file_path)
+
+        # Keep segment timings so clients can jump into the recording later.
+        # Saved before indexing, so a consult is only indexed under an id the client gets back
+        transcript_id = uuid.uuid4().hex
+        segments = SegmentTranscript.from_whisper(result)
+        segments.save(segment_path(transcript_id))
+
+        # Queue the consult for indexing; embedding happens off the request path
+        app.state.store.add(transcription, summary, source=file.filename, consult_id=transcript_id)
         
         # Return the result as a dictionary
         output = {
+            'transcript_id': transcript_id,
             'transcription': transcription,
-            'summary': summary
+            'summary': summary,
+            'segments': segments.to_dicts()
         }
         
         print(output)
@@ -80,7 +106,7 @@ def transcribe_and_translate_audio_with_groq(audio_file, target_language="en", a
         api_key (str): Groq API key for authentication.
 
     Returns:
-        dict: Contains transcription and/or translation results or error details.
+        dict: The verbose_json translation result ("text" plus timed "segments") or error details.
     """
     try:
         # Ensure the file exists
@@ -102,7 +128,8 @@ def transcribe_and_translate_audio_with_groq(audio_file, target_language="en", a
         with open(audio_file_path, 'rb') as file:
             files = {
                 'file': (os.path.basename(audio_file_path), file, 'audio/mpeg'),
-                'model': (None, 'whisper-large-v3')
+                'model': (None, 'whisper-large-v3'),
+                'response_format': (None, 'verbose_json')
             }
 
             # Step 1: Transcription
@@ -131,7 +158,7 @@ def transcribe_and_translate_audio_with_groq(audio_file, target_language="en", a
 
             print(f"Translation completed: {translation}")
 
-            return translation
+            return translation_data
 
     except Exception as e:
         print(f"Error during transcription or translation: {str(e)}")
@@ -141,6 +168,28 @@ def transcribe_and_translate_audio_with_groq(audio_file, target_language="en", a
 def root():
     return {"message": "Doctor-Patient Voice Processing Backend"}
 
+@app.get("/search")
+def search_consults(query: str, limit: int = 5):
+    """
+    Returns past consults whose summaries are most similar to the query.
+    """
+    try:
+        return {"results": app.state.store.search(query, limit)}
+    except Exception as e:
+        print(f"Error searching consults: {e}")
+        return {"error": str(e)}
+
+@app.get("/transcripts/{transcript_id}/segments")
+def get_segments(transcript_id: str, start: float = None, end: float = None, q: str = None, words: bool = True):
+    """
+    Returns the segments of a past consult that overlap [start, end) seconds and/or contain q.
+    """
+    try:
+        return {"segments": query_segments(transcript_id, start, end, q, words)}
+    except Exception as e:
+        print(f"Error querying segments: {e}")
+        return {"error": str(e)}
+
 # Example to verify Whisper and FFmpeg configurations
 def verify_ffmpeg_installation():
     try:
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -7,8 +8,20 @@ import os
 import requests
 import json
 import time
+import uuid
 
-app = FastAPI()
+from segment_store import SegmentTranscript, query_segments, segment_path
+from transcript_store import TranscriptStore
+
+@asynccontextmanager
+async def lifespan(app):
+    # Past consults, embedded and indexed in the background for /search
+    app.state.store = TranscriptStore()
+    app.state.store.start()
+    yield
+    app.state.store.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware to allow requests from any origin
 app.add_middleware(
@@ -31,11 +44,13 @@ async def process_voice(file: UploadFile = File(...)):
             print("File Path : " + file_path)
 
        
-        transcription= transcribe_and_translate_audio(file_path)
+        result = transcribe_and_translate_audio(file_path)
 
-        if transcription is None:
+        if result is None:
             raise ValueError("Transcription failed.")
 
+        transcription = result.get("text", "").strip()
+
         print("transcription: " + transcription)
 
         if not transcription:
@@ -52,9 +67,21 @@ async def process_voice(file: UploadFile = File(...)):
 
         # Cleanup: Remove the saved file after processing
         os.remove(file_path)
+
+        # Keep segment and word timings so clients can jump into the recording later.
+        # Saved before indexing, so a consult is only indexed under an id the client gets back
+        transcript_id = uuid.uuid4().hex
+        segments = SegmentTranscript.from_whisper(result)
+        segments.save(segment_path(transcript_id))
+
+        # Queue the consult for indexing; embedding happens off the request path
+        app.state.store.add(transcription, summary, source=file.filename, consult_id=transcript_id)
+
         output =  {
+        'transcript_id': transcript_id,
         'transcription': transcription,
-        'summary': summary
+        'summary': summary,
+        'segments': segments.to_dicts()
         }
         
         print(output)
@@ -68,6 +95,7 @@ async def process_voice(file: UploadFile = File(...)):
 def transcribe_and_translate_audio(audio_file, target_language="en"):
     """
     Translates audio from any language to the specified target language using Whisper.
+    Returns Whisper's JSON result: the full "text" plus "segments" with word timestamps.
     """
     try:
         # Get absolute path and ensure file exists
@@ -77,14 +105,15 @@ def transcribe_and_translate_audio(audio_file, target_language="en"):
 
         # Define output directory and format
         output_dir = os.path.dirname(audio_file_path)
-        output_format = "txt"
+        output_format = "json"
 
         # Run Whisper with translation task
         result = subprocess.run(
             [
                 "whisper", audio_file_path, "--model", "base",
                 "--task", "translate", "--language", target_language,
-                "--output_dir", output_dir, "--output_format", output_format
+                "--output_dir", output_dir, "--output_format", output_format,
+                "--word_timestamps", "True"
             ],
             capture_output=True,
             text=True,
@@ -97,11 +126,11 @@ def transcribe_and_translate_audio(audio_file, target_language="en"):
 
         # Read translation from the generated file
         translation_file = os.path.join(
-            output_dir, f"{os.path.basename(audio_file_path).split('.')[0]}.txt"
+            output_dir, f"{os.path.basename(audio_file_path).split('.')[0]}.json"
         )
         if os.path.exists(translation_file):
             with open(translation_file, "r", encoding="utf-8") as file:
-                translation = file.read().strip()
+                translation = json.load(file)
             return translation
         else:
             raise FileNotFoundError(f"Translation file not found: {translation_file}")
@@ -151,6 +180,28 @@ def summarize_with_ollama(text):
 def root():
     return {"message": "Doctor-Patient Voice Processing Backend"}
 
+@app.get("/search")
+def search_consults(query: str, limit: int = 5):
+    """
+    Returns past consults whose summaries are most similar to the query.
+    """
+    try:
+        return {"results": app.state.store.search(query, limit)}
+    except Exception as e:
+        print(f"Error searching consults: {e}")
+        return {"error": str(e)}
+
+@app.get("/transcripts/{transcript_id}/segments")
+def get_segments(transcript_id: str, start: float = None, end: float = None, q: str = None, words: bool = True):
+    """
+    Returns the segments of a past consult that overlap [start, end) seconds and/or contain q.
+    """
+    try:
+        return {"segments": query_segments(transcript_id, start, end, q, words)}
+    except Exception as e:
+        print(f"Error querying segments: {e}")
+        return {"error": str(e)}
+
 
 # Example to verify Whisper and FFmpeg configurations
 def verify_ffmpeg_installation():
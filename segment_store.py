@@ -0,0 +1,269 @@
+import math
+import mmap
+import os
+import re
+import struct
+
+import numpy as np
+
+SEGMENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "segments")
+
+# File layout: header, then the arrays below in this order (each 8-byte aligned), then the text buffer.
+# Segment text is stored first in the buffer and word text after it; *_text arrays hold byte offsets.
+MAGIC = b"VSEG"
+VERSION = 2
+HEADER = struct.Struct("<4sIIIQ")  # magic, version, segment count, word count, text bytes
+SECTIONS = [
+    # name, dtype, length (in terms of n segments / m words)
+    ("seg_start", np.float32, lambda n, m: n),
+    ("seg_end", np.float32, lambda n, m: n),
+    # Running maximum of seg_end, so time-range lookups can binary search even if segments overlap
+    ("seg_end_max", np.float32, lambda n, m: n),
+    ("seg_conf", np.float32, lambda n, m: n),
+    ("seg_text", np.uint32, lambda n, m: n + 1),
+    ("seg_word", np.uint32, lambda n, m: n + 1),
+    ("word_start", np.float32, lambda n, m: m),
+    ("word_end", np.float32, lambda n, m: m),
+    ("word_conf", np.float32, lambda n, m: m),
+    ("word_text", np.uint32, lambda n, m: m + 1),
+]
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _layout(n_segments, n_words):
+    """
+    Returns the byte offset of every array section and of the text buffer.
+    """
+    offsets = {}
+    offset = _align(HEADER.size)
+    for name, dtype, length in SECTIONS:
+        offsets[name] = offset
+        offset = _align(offset + np.dtype(dtype).itemsize * length(n_segments, n_words))
+    offsets["text"] = offset
+    return offsets
+
+
+class SegmentTranscript:
+    """
+    Segment and word timings for one transcript, held in typed arrays with all text in a single
+    UTF-8 buffer. Files written by save() are opened with a memory map, so queries only touch
+    the pages they need instead of loading the whole document.
+    """
+
+    def __init__(self, arrays, text, mapping=None):
+        for name, _, _ in SECTIONS:
+            setattr(self, name, arrays[name])
+        self.text_buffer = text
+        self._mmap = mapping
+
+    @classmethod
+    def from_whisper(cls, result):
+        """
+        Builds the arrays from a Whisper JSON / verbose_json result with a "segments" list.
+        Words are taken from each segment's "words" list when word timestamps were requested.
+        Segments (and the words within each) are ordered by start time.
+        """
+        segments = sorted(result.get("segments") or [], key=lambda segment: segment.get("start", 0.0))
+        seg_start, seg_end, seg_conf, seg_text, seg_word = [], [], [], [0], [0]
+        word_start, word_end, word_conf, word_text = [], [], [], []
+        seg_chunks, word_chunks = [], []
+        seg_bytes = 0
+
+        for segment in segments:
+            encoded = segment.get("text", "").encode("utf-8")
+            seg_chunks.append(encoded)
+            seg_bytes += len(encoded)
+            seg_start.append(segment.get("start", 0.0))
+            seg_end.append(segment.get("end", 0.0))
+            # Whisper reports the average token log-probability; store it as a probability
+            seg_conf.append(math.exp(segment.get("avg_logprob", 0.0)))
+            seg_text.append(seg_bytes)
+
+            for word in sorted(segment.get("words") or [], key=lambda word: word.get("start", 0.0)):
+                word_chunks.append(word.get("word", "").encode("utf-8"))
+                word_start.append(word.get("start", 0.0))
+                word_end.append(word.get("end", 0.0))
+                word_conf.append(word.get("probability", 0.0))
+            seg_word.append(len(word_start))
+
+        # Word offsets continue on from the end of the segment text
+        word_offset = seg_bytes
+        word_text.append(word_offset)
+        for chunk in word_chunks:
+            word_offset += len(chunk)
+            word_text.append(word_offset)
+
+        arrays = {
+            "seg_start": np.array(seg_start, dtype=np.float32),
+            "seg_end": np.array(seg_end, dtype=np.float32),
+            "seg_end_max": np.maximum.accumulate(np.array(seg_end, dtype=np.float32)),
+            "seg_conf": np.array(seg_conf, dtype=np.float32),
+            "seg_text": np.array(seg_text, dtype=np.uint32),
+            "seg_word": np.array(seg_word, dtype=np.uint32),
+            "word_start": np.array(word_start, dtype=np.float32),
+            "word_end": np.array(word_end, dtype=np.float32),
+            "word_conf": np.array(word_conf, dtype=np.float32),
+            "word_text": np.array(word_text, dtype=np.uint32),
+        }
+        return cls(arrays, b"".join(seg_chunks + word_chunks))
+
+    @classmethod
+    def open(cls, path):
+        """
+        Memory-maps a file written by save(). Arrays are views over the mapping.
+        """
+        with open(path, "rb") as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, n_segments, n_words, text_bytes = HEADER.unpack_from(mapping, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Not a segment file: {path}")
+
+            offsets = _layout(n_segments, n_words)
+            if offsets["text"] + text_bytes > len(mapping):
+                raise ValueError(f"Truncated segment file: {path}")
+
+            arrays = {}
+            for name, dtype, length in SECTIONS:
+                arrays[name] = np.frombuffer(
+                    mapping, dtype=dtype, count=length(n_segments, n_words), offset=offsets[name]
+                )
+            text = memoryview(mapping)[offsets["text"]:offsets["text"] + text_bytes]
+        except Exception:
+            # Drop any views over the mapping first, or close() refuses with exported buffers
+            arrays = text = None
+            mapping.close()
+            raise
+        return cls(arrays, text, mapping)
+
+    def save(self, path):
+        """
+        Writes the transcript in the on-disk format read by open().
+        """
+        n_segments, n_words = len(self), len(self.word_start)
+        offsets = _layout(n_segments, n_words)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # Write to a temporary file and rename it into place, so a failed save never leaves a partial file
+        temp_path = path + ".tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(HEADER.pack(MAGIC, VERSION, n_segments, n_words, len(self.text_buffer)))
+                for name, dtype, _ in SECTIONS:
+                    file.write(b"\0" * (offsets[name] - file.tell()))
+                    file.write(np.ascontiguousarray(getattr(self, name), dtype=dtype).tobytes())
+                file.write(b"\0" * (offsets["text"] - file.tell()))
+                file.write(self.text_buffer)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def close(self):
+        """
+        Releases the memory map of a transcript returned by open().
+        """
+        if self._mmap is None:
+            return
+        for name, _, _ in SECTIONS:
+            setattr(self, name, None)
+        self.text_buffer.release()
+        self.text_buffer = None
+        self._mmap.close()
+        self._mmap = None
+
+    def __len__(self):
+        return len(self.seg_start)
+
+    def segments_between(self, start, end):
+        """
+        Returns the indices of segments overlapping the [start, end) time range in seconds.
+        """
+        # Every segment before `first` ends by `start`; a segment nested inside an earlier, longer
+        # one can still end before `start` after it, so those are filtered out of the slice
+        first = np.searchsorted(self.seg_end_max, start, side="right")
+        last = np.searchsorted(self.seg_start, end, side="left")
+        indices = np.arange(first, max(first, last))
+        return indices[self.seg_end[indices] > start]
+
+    def find(self, keyword):
+        """
+        Returns the indices of segments containing the keyword (case-insensitive for ASCII).
+        Scans the segment region of the text buffer without decoding it. A match that runs across
+        a segment boundary is reported for every segment it covers.
+        """
+        pattern = re.compile(re.escape(keyword.encode("utf-8")), re.IGNORECASE)
+        segment_text = self.text_buffer[:int(self.seg_text[-1])]
+        spans = [(match.start(), match.end() - 1) for match in pattern.finditer(segment_text)]
+        if not spans:
+            return np.array([], dtype=np.int64)
+
+        firsts = np.searchsorted(self.seg_text, [first for first, _ in spans], side="right") - 1
+        lasts = np.searchsorted(self.seg_text, [last for _, last in spans], side="right") - 1
+        return np.unique(np.concatenate([np.arange(f, l + 1) for f, l in zip(firsts, lasts)]))
+
+    def segment(self, index, words=True):
+        """
+        Returns one segment as a JSON-ready dict.
+        """
+        start, end = int(self.seg_text[index]), int(self.seg_text[index + 1])
+        result = {
+            "id": int(index),
+            "start": round(float(self.seg_start[index]), 3),
+            "end": round(float(self.seg_end[index]), 3),
+            "confidence": round(float(self.seg_conf[index]), 3),
+            "text": bytes(self.text_buffer[start:end]).decode("utf-8", errors="replace"),
+        }
+        if words:
+            result["words"] = [
+                self.word(i) for i in range(int(self.seg_word[index]), int(self.seg_word[index + 1]))
+            ]
+        return result
+
+    def word(self, index):
+        start, end = int(self.word_text[index]), int(self.word_text[index + 1])
+        return {
+            "start": round(float(self.word_start[index]), 3),
+            "end": round(float(self.word_end[index]), 3),
+            "confidence": round(float(self.word_conf[index]), 3),
+            "text": bytes(self.text_buffer[start:end]).decode("utf-8", errors="replace"),
+        }
+
+    def to_dicts(self, indices=None, words=True):
+        if indices is None:
+            indices = range(len(self))
+        return [self.segment(i, words) for i in indices]
+
+
+def segment_path(transcript_id):
+    return os.path.join(SEGMENT_DIR, f"{transcript_id}.seg")
+
+
+def query_segments(transcript_id, start=None, end=None, keyword=None, words=True):
+    """
+    Answers a time-range and/or keyword query against a saved transcript.
+    """
+    if not transcript_id.isalnum():
+        raise ValueError(f"Invalid transcript id: {transcript_id}")
+    path = segment_path(transcript_id)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Transcript not found: {transcript_id}")
+
+    transcript = SegmentTranscript.open(path)
+    try:
+        indices = np.arange(len(transcript))
+        if start is not None or end is not None:
+            indices = transcript.segments_between(
+                start if start is not None else 0.0,
+                end if end is not None else np.inf,
+            )
+        if keyword:
+            indices = np.intersect1d(indices, transcript.find(keyword))
+        return transcript.to_dicts(indices, words)
+    finally:
+        transcript.close()
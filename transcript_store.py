@@ -0,0 +1,217 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+import chromadb
+from chromadb.utils import embedding_functions
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcript_store")
+COLLECTION_NAME = "consults"
+
+# Consults that still failed to index after MAX_ATTEMPTS; replayed the next time the store starts
+FAILED_FILE = "failed_consults.jsonl"
+
+# Embedding batch size and the longest time a queued consult waits before it is indexed
+BATCH_SIZE = 64
+FLUSH_INTERVAL = 1.0
+
+# Indexing attempts per consult, with RETRY_DELAY seconds between attempts
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 2.0
+
+
+class TranscriptStore:
+    """
+    Persists transcripts and summaries in Chroma and keeps its HNSW index up to date
+    from a background thread, so the request path only has to enqueue the record.
+    """
+
+    def __init__(self, path=STORE_DIR, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 embedding_function=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # MiniLM-L6 through onnxruntime, pinned to the CPU provider
+        self.embedding_function = embedding_function or embedding_functions.ONNXMiniLM_L6_V2(
+            preferred_providers=["CPUExecutionProvider"]
+        )
+
+        # Consult data stays local, so Chroma's anonymous usage telemetry is switched off too
+        self.client = chromadb.PersistentClient(
+            path=path, settings=chromadb.Settings(anonymized_telemetry=False)
+        )
+        self.collection = self.client.get_or_create_collection(
+            name=COLLECTION_NAME,
+            embedding_function=self.embedding_function,
+            metadata={
+                "hnsw:space": "cosine",
+                "hnsw:M": 16,
+                "hnsw:construction_ef": 100,
+                "hnsw:search_ef": 64,
+                # Let Chroma buffer our batches in memory and sync the index to disk less often
+                "hnsw:batch_size": 1000,
+                "hnsw:sync_threshold": 10000,
+            },
+        )
+
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._worker = None
+
+    def start(self):
+        """
+        Starts the background indexer and re-queues consults that failed to index last time.
+        """
+        self._replay_failed()
+        self._stopped.clear()
+        self._worker = threading.Thread(target=self._run, name="transcript-indexer", daemon=True)
+        self._worker.start()
+
+    def add(self, transcription, summary="", source="", consult_id=None):
+        """
+        Queues a consult for embedding and indexing. Returns its id (generated unless given) immediately.
+        """
+        consult_id = consult_id or uuid.uuid4().hex
+        self._queue.put({
+            "id": consult_id,
+            "transcription": transcription,
+            "summary": summary or "",
+            "source": source or "",
+            "created_at": time.time(),
+            "attempts": 0,
+        })
+        return consult_id
+
+    def search(self, query, limit=5):
+        """
+        Returns the consults most similar to the query text, closest first.
+        """
+        # No collection.count() up front: it is a full table count in Chroma and grows with the corpus.
+        # query() already returns fewer (or no) results when the collection holds fewer than limit
+        query_embedding = self.embedding_function([query])
+        result = self.collection.query(
+            query_embeddings=query_embedding,
+            n_results=limit,
+            include=["documents", "metadatas", "distances"],
+        )
+
+        matches = []
+        for consult_id, document, metadata, distance in zip(
+            result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0]
+        ):
+            matches.append({
+                "id": consult_id,
+                "transcription": document,
+                "summary": metadata.get("summary", ""),
+                "source": metadata.get("source", ""),
+                "created_at": metadata.get("created_at"),
+                "distance": distance,
+            })
+        return matches
+
+    def flush(self):
+        """
+        Blocks until every queued consult has been indexed or given up on.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Indexes whatever is still queued and stops the background thread.
+        """
+        if self._worker is None:
+            return
+        self.flush()
+        self._stopped.set()
+        self._worker.join()
+        self._worker = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+
+            # Keep filling the batch until it is full or the flush interval runs out
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._index(batch)
+            except Exception as e:
+                self._retry(batch, e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _retry(self, batch, error):
+        """
+        Re-queues a batch that failed to index, or records it for replay once it has used up its attempts.
+        Runs before the batch's task_done() calls, so flush() keeps waiting for re-queued consults.
+        """
+        retry, failed = [], []
+        for record in batch:
+            record["attempts"] += 1
+            (retry if record["attempts"] < MAX_ATTEMPTS else failed).append(record)
+
+        if retry:
+            print(f"Error indexing consults, retrying {[r['id'] for r in retry]}: {error}")
+            time.sleep(RETRY_DELAY)
+            for record in retry:
+                self._queue.put(record)
+
+        if failed:
+            print(f"Error indexing consults, saved for replay {[r['id'] for r in failed]}: {error}")
+            try:
+                with open(os.path.join(self.path, FAILED_FILE), "a", encoding="utf-8") as file:
+                    for record in failed:
+                        file.write(json.dumps(record) + "\n")
+            except Exception as e:
+                print(f"Error saving failed consults: {e}")
+
+    def _replay_failed(self):
+        failed_path = os.path.join(self.path, FAILED_FILE)
+        if not os.path.exists(failed_path):
+            return
+
+        with open(failed_path, "r", encoding="utf-8") as file:
+            records = [json.loads(line) for line in file if line.strip()]
+        os.remove(failed_path)
+
+        for record in records:
+            record["attempts"] = 0
+            self._queue.put(record)
+        print(f"Replaying {len(records)} consults that failed to index")
+
+    def _index(self, batch):
+        # The summary is the densest description of a consult, so it is what gets embedded;
+        # fall back to the transcription when summarization produced nothing
+        texts = [record["summary"] or record["transcription"] for record in batch]
+        embeddings = self.embedding_function(texts)
+
+        # upsert so a consult re-queued after a partial failure does not trip over its own id
+        self.collection.upsert(
+            ids=[record["id"] for record in batch],
+            embeddings=embeddings,
+            documents=[record["transcription"] for record in batch],
+            metadatas=[
+                {
+                    "summary": record["summary"],
+                    "source": record["source"],
+                    "created_at": record["created_at"],
+                }
+                for record in batch
+            ],
+        )